@@ -1,64 +1,465 @@
 import argparse
 import asyncio
+import hashlib
+import json
 import os
+import sqlite3
 import sys
+import time
+from typing import Any, Callable, List, Optional, Tuple
 
-from fastmcp import Client
-from google import genai
+# fastmcp is imported by MCPSessionPool.acquire() and google.genai/httpx by
+# init_gemini_client(), so --help and argument errors return without paying
+# their import cost.
 
 # --- Initialization (Outside main) ---
-mcp_client = Client("./mcp_command_server_enh.py")
-# Assuming gemini_client initialization is safe outside the async function
-# and that API key is set via environment variable (e.g., GEMINI_API_KEY)
-try:
-    gemini_client = genai.Client()
-except Exception as e:
-    # Handle the case where the client cannot be initialized (e.g., no API key)
-    print(f"Error initializing Gemini client: {e}", file=sys.stderr)
-    sys.exit(1)
-
-async def run_query(prompt_content: str):
+MCP_SERVER_PATH = "./mcp_command_server_enh.py"
+SESSION_TTL = 300              # seconds an idle MCP session is kept before it is recycled
+SESSION_PING_INTERVAL = 30     # seconds of idleness after which the session is pinged before reuse
+
+
+class MCPSessionPool:
+    """
+    Keeps a single warm FastMCP client session open across queries.
+
+    The session is started lazily on the first acquire() and reused afterwards,
+    so the server subprocess and the MCP initialize handshake are paid once per
+    process instead of once per query. Idle sessions past their TTL, sessions
+    that fail a ping, and sessions invalidated after an error are recycled.
+
+    Concurrent queries share the session, so each acquire() must be paired
+    with a release(). A recycled session is only closed once its last holder
+    has released it; until then new queries get a fresh session.
+    """
+
+    def __init__(self, server_path: str, ttl: float = SESSION_TTL):
+        self.server_path = server_path
+        self.ttl = ttl
+        self._client = None
+        self._last_used = 0.0
+        self._checkouts = {}     # client -> number of queries currently holding it
+        self._retired = set()    # replaced clients to close on their last release
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> "fastmcp.Client":
+        """Return a connected client, (re)starting the session if needed."""
+        async with self._lock:
+            if self._client is not None and not await self._is_healthy():
+                await self._retire(self._client)
+            if self._client is None:
+                from fastmcp import Client
+                client = Client(self.server_path)
+                await client.__aenter__()
+                _memoize_list_tools(client.session)
+                self._client = client
+            self._checkouts[self._client] = self._checkouts.get(self._client, 0) + 1
+            self._last_used = time.monotonic()
+            return self._client
+
+    async def release(self, client: "fastmcp.Client") -> None:
+        """Hand a client back; it stays open for the next query unless retired."""
+        async with self._lock:
+            count = self._checkouts.pop(client, 0) - 1
+            if count > 0:
+                self._checkouts[client] = count
+            if client is self._client:
+                self._last_used = time.monotonic()
+            elif count <= 0 and client in self._retired:
+                self._retired.discard(client)
+                await self._close_client(client)
+
+    async def invalidate(self, client: "fastmcp.Client") -> None:
+        """
+        Stop handing out a session after an error so the next acquire() starts
+        fresh. The caller must still release() it; it is closed once no query
+        holds it.
+        """
+        async with self._lock:
+            if client is self._client:
+                await self._retire(client)
+
+    async def close(self) -> None:
+        """Close the pooled session and any retired ones, if any."""
+        async with self._lock:
+            clients = [self._client, *self._retired]
+            self._client = None
+            self._retired.clear()
+            self._checkouts.clear()
+            for client in clients:
+                if client is not None:
+                    await self._close_client(client)
+
+    async def _is_healthy(self) -> bool:
+        if not self._client.is_connected():
+            return False
+        if self._checkouts.get(self._client):
+            # In use by another query, so it is neither idle nor safe to ping-test
+            return True
+        idle = time.monotonic() - self._last_used
+        if idle > self.ttl:
+            return False
+        if idle > SESSION_PING_INTERVAL:
+            try:
+                await self._client.ping()
+            except Exception:
+                return False
+        return True
+
+    async def _retire(self, client) -> None:
+        """Detach client from the pool, closing it now if nobody holds it."""
+        self._client = None
+        if self._checkouts.get(client):
+            self._retired.add(client)
+        else:
+            await self._close_client(client)
+
+    @staticmethod
+    async def _close_client(client) -> None:
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception as e:
+            print(f"Error closing MCP session: {e}", file=sys.stderr)
+
+
+def _is_session_error(client, exc: BaseException) -> bool:
+    """True if exc means the MCP session itself is broken, not just the Gemini call."""
+    import anyio
+    from mcp import McpError
+
+    if not client.is_connected():
+        return True
+    return isinstance(exc, (
+        McpError, ConnectionError, EOFError,
+        anyio.ClosedResourceError, anyio.BrokenResourceError,
+    ))
+
+
+def _memoize_list_tools(session) -> None:
+    """
+    Make session.list_tools() fetch the server's tools only once.
+
+    google.genai lists the session's tools on every generate_content call to
+    build the function declarations. This server's tool set is fixed for the
+    life of the process, so later calls reuse the first listing. Paginated
+    calls (with a cursor) still go to the server.
+    """
+    list_tools = session.list_tools
+    listing = None
+
+    async def cached_list_tools(*args, **kwargs):
+        nonlocal listing
+        if args or kwargs:
+            return await list_tools(*args, **kwargs)
+        if listing is None:
+            listing = await list_tools()
+        return listing
+
+    session.list_tools = cached_list_tools
+
+
+mcp_pool = MCPSessionPool(MCP_SERVER_PATH)
+
+# --- Gemini request config ---
+GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_INPUT_TOKEN_LIMIT = 1_048_576   # context window of GEMINI_MODEL
+TOKEN_CHECK_THRESHOLD = 800_000        # local estimate above which count_tokens confirms the size
+
+_tool_signature = (None, None)   # (session, signature) of the last pooled session
+
+
+async def get_tool_signature(session) -> str:
+    """Return a stable JSON description of the session's tools, listed once per session."""
+    global _tool_signature
+    cached_session, signature = _tool_signature
+    if cached_session is not session:
+        result = await session.list_tools()
+        signature = json.dumps(
+            [tool.model_dump(mode="json") for tool in result.tools], sort_keys=True
+        )
+        _tool_signature = (session, signature)
+    return signature
+
+# --- Local response cache (opt-in with --cache) ---
+RESPONSE_CACHE_PATH = os.path.expanduser("~/.cache/mcp_cmd/exact.db")
+
+
+class ExactResponseCache:
+    """
+    Exact-match cache of Gemini responses stored in SQLite.
+
+    Entries are keyed on the model, the prompt text and the MCP tool
+    signature, so a changed prompt or tool set never serves a stale answer.
+    """
+
+    def __init__(self, path: str = RESPONSE_CACHE_PATH):
+        self.path = path
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(hash TEXT PRIMARY KEY, response TEXT, usage JSON)"
+            )
+        return self._conn
+
+    @staticmethod
+    def key(model: str, prompt_content: str, tool_signature: str) -> str:
+        digest = hashlib.blake2b(digest_size=32)
+        for part in (model, prompt_content, tool_signature):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response text for key, or None on a miss."""
+        row = self._connect().execute(
+            "SELECT response FROM responses WHERE hash = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, response: str, usage: Optional[str]) -> None:
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (hash, response, usage) VALUES (?, ?, ?)",
+            (key, response, usage),
+        )
+        conn.commit()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+response_cache: Optional[ExactResponseCache] = None   # set by main() when --cache is given
+
+gemini_client = None
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (about four characters per token)."""
+    return len(text) // 4
+
+def init_gemini_client():
+    """
+    Import google.genai and create the Gemini client.
+
+    Runs in a worker thread while the MCP server subprocess starts. The API key
+    is taken from the environment (e.g., GEMINI_API_KEY).
+    """
+    global gemini_client
+    if gemini_client is not None:
+        return
+
+    import httpx
+    from google import genai
+
+    # One keep-alive transport shared by every Gemini request in the process, so
+    # follow-up requests reuse the open TLS connection instead of reconnecting.
+    transport = httpx.AsyncHTTPTransport(
+        retries=1,
+        limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=300),
+    )
+    gemini_client = genai.Client(
+        http_options=genai.types.HttpOptions(
+            async_client_args={"transport": transport},
+        )
+    )
+
+def print_usage(usage_metadata, writer: Optional[Callable[[str], Any]] = None) -> None:
+    """
+    Write the token-usage block for a response's usage metadata in one call.
+
+    Cache reads are billed at a discount, so they are reported apart from
+    fresh input. writer defaults to sys.stdout.write; pass another (e.g.
+    logger.info) to route the block elsewhere.
+    """
+    writer = writer or sys.stdout.write
+    input_tokens = usage_metadata.prompt_token_count or 0
+    cached_tokens = usage_metadata.cached_content_token_count or 0
+    writer(
+        "--- Token Usage ---\n"
+        f"Input (fresh):  {input_tokens - cached_tokens}\n"
+        f"Input (cached): {cached_tokens}\n"
+        f"Output Tokens:  {usage_metadata.candidates_token_count}\n"
+        f"Total Tokens:   {usage_metadata.total_token_count}\n"
+        "-------------------\n"
+    )
+
+async def run_query(
+    prompt_content: str,
+    stream_output: bool = True,
+    label: Optional[str] = None,
+    *,
+    pool: Optional[MCPSessionPool] = None,
+    gemini=None,
+):
     """
     Core async function to interact with FastMCP and Gemini.
     Takes the prompt content as an argument.
+
+    With stream_output=False the response is collected and printed as one
+    block, so concurrent queries in batch mode do not interleave their output.
+    label, if given, names the prompt in the response header.
+    pool and gemini default to the module's mcp_pool and gemini_client and
+    can be passed in to run the query against other clients.
     """
+    # Imported here so an injected gemini client works without init_gemini_client()
+    from google.genai import types
+
+    pool = pool or mcp_pool
+    gemini = gemini or gemini_client
     if not prompt_content:
         print("Error: Prompt content is empty.", file=sys.stderr)
         return
 
     print(f"Sending prompt to Gemini/FastMCP: '{prompt_content[:80]}...'")
 
+    mcp_client = None
     try:
-        async with mcp_client:
-            # The only change here is replacing the hardcoded string with the variable
-            response = await gemini_client.aio.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt_content,  # Use the dynamic prompt
-                config=genai.types.GenerateContentConfig(
-                    temperature=0,
-                    tools=[mcp_client.session],  # Pass the FastMCP client session
-                ),
+        # Only ask the API for an exact count when the prompt may not fit
+        if estimate_tokens(prompt_content) > TOKEN_CHECK_THRESHOLD:
+            count = await gemini.aio.models.count_tokens(
+                model=GEMINI_MODEL,
+                contents=prompt_content,
             )
-            print("--- Response ---")
-            print(response.text)
-            print("----------------")
-            
-            # --- ADDED: Token Count Display ---
-            # Access the usage metadata from the response to get token counts
-            if response.usage_metadata:
-                input_tokens = response.usage_metadata.prompt_token_count
-                output_tokens = response.usage_metadata.candidates_token_count
-                total_tokens = response.usage_metadata.total_token_count
-                
-                print("--- Token Usage ---")
-                print(f"Input Tokens:  {input_tokens}")
-                print(f"Output Tokens: {output_tokens}")
-                print(f"Total Tokens:  {total_tokens}")
-                print("-------------------")
-            # --- END of ADDED section ---
+            if count.total_tokens and count.total_tokens > GEMINI_INPUT_TOKEN_LIMIT:
+                print(
+                    f"Error: Prompt is {count.total_tokens} tokens, over the "
+                    f"{GEMINI_INPUT_TOKEN_LIMIT} token limit of {GEMINI_MODEL}.",
+                    file=sys.stderr,
+                )
+                return
+
+        # Reuse the warm pooled session instead of a fresh handshake per query
+        mcp_client = await pool.acquire()
+        header = f"--- Response: {label} ---" if label else "--- Response ---"
+
+        cache_key = None
+        if response_cache is not None:
+            cache_key = response_cache.key(
+                GEMINI_MODEL, prompt_content, await get_tool_signature(mcp_client.session)
+            )
+            cached_text = response_cache.get(cache_key)
+            if cached_text is not None:
+                print(header)
+                print(cached_text)
+                print("----------------")
+                print("(Served from the local response cache; no tokens used.)")
+                return
+
+        stream = await gemini.aio.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=prompt_content,  # Use the dynamic prompt
+            config=types.GenerateContentConfig(
+                temperature=0,
+                tools=[mcp_client.session],  # Pass the FastMCP client session
+            ),
+        )
+        # Print chunks as they arrive; the last chunk carries the final usage totals
+        text_parts = []
+        usage_metadata = None
+        if stream_output:
+            print(header)
+        async for chunk in stream:
+            if chunk.text:
+                text_parts.append(chunk.text)
+                if stream_output:
+                    sys.stdout.write(chunk.text)
+                    sys.stdout.flush()
+            if chunk.usage_metadata:
+                usage_metadata = chunk.usage_metadata
+        response_text = "".join(text_parts)
+        if not stream_output:
+            print(header)
+            sys.stdout.write(response_text)
+        print()
+        print("----------------")
+
+        if cache_key is not None:
+            response_cache.put(
+                cache_key,
+                response_text,
+                usage_metadata.model_dump_json() if usage_metadata else None,
+            )
+
+        if usage_metadata:
+            print_usage(usage_metadata)
 
     except Exception as e:
         print(f"An error occurred during the API call: {e}", file=sys.stderr)
+        if mcp_client is not None and _is_session_error(mcp_client, e):
+            # The session is broken; stop sharing it so the next query starts a fresh one
+            await pool.invalidate(mcp_client)
+    finally:
+        if mcp_client is not None:
+            await pool.release(mcp_client)
+
+BATCH_CONCURRENCY = 10   # max prompts in flight at once in --file-list mode
+
+async def run_session(prompts: List[Tuple[Optional[str], str]]):
+    """
+    Run (label, prompt) pairs over one pooled MCP session, then shut it down.
+
+    A single prompt streams its response; several prompts run concurrently,
+    bounded by BATCH_CONCURRENCY, and each response is printed as one block.
+    """
+    # Spawn the MCP server and run its handshake while the Gemini client is
+    # imported and built in a worker thread; the two are independent.
+    warmup = asyncio.create_task(mcp_pool.acquire())
+    try:
+        try:
+            await asyncio.to_thread(init_gemini_client)
+        except Exception as e:
+            # Handle the case where the client cannot be initialized (e.g., no API key)
+            print(f"Error initializing Gemini client: {e}", file=sys.stderr)
+            sys.exit(1)
+        # A failed warmup is retried, and reported, by the first run_query
+        warm_client = (await asyncio.gather(warmup, return_exceptions=True))[0]
+        if not isinstance(warm_client, BaseException):
+            await mcp_pool.release(warm_client)
+
+        if len(prompts) == 1:
+            await run_query(prompts[0][1])
+            return
+
+        sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def run_one(label: Optional[str], prompt_content: str):
+            async with sem:
+                await run_query(prompt_content, stream_output=False, label=label)
+
+        await asyncio.gather(*(run_one(label, content) for label, content in prompts))
+    finally:
+        await asyncio.gather(warmup, return_exceptions=True)
+        await mcp_pool.close()
+        if gemini_client is not None:
+            await gemini_client.aio.aclose()
+        if response_cache is not None:
+            response_cache.close()
+
+def read_prompt_file(path: str) -> str:
+    """
+    Read a prompt file straight from its file descriptor.
+
+    The file is read as raw bytes sized from fstat and decoded once, which
+    skips the buffered text-mode layer for large prompt files.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        chunks = []
+        while True:
+            data = os.read(fd, max(size, 65536))
+            if not data:
+                break
+            chunks.append(data)
+    finally:
+        os.close(fd)
+    data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+    return data.decode("utf-8").strip()
 
 # The original main function is now for argument parsing and setup
 def main():
@@ -78,27 +479,67 @@ def main():
         type=str,
         help="Path to a text file containing the prompt."
     )
+    group.add_argument(
+        "-F", "--file-list",
+        type=str,
+        help="Path to a text file listing one prompt file per line; the prompts run concurrently."
+    )
+
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Answer repeated identical prompts from a local response cache. "
+             "Off by default because tool calls can change the machine's state."
+    )
 
     args = parser.parse_args()
-    prompt_content = None
+    prompts = []
 
-    if args.prompt:
-        prompt_content = args.prompt
-    elif args.file:
-        try:
-            with open(args.file, 'r') as f:
-                prompt_content = f.read().strip()
-        except FileNotFoundError:
-            print(f"Error: Prompt file not found at '{args.file}'", file=sys.stderr)
-            sys.exit(1)
-        except Exception as e:
-            print(f"Error reading file '{args.file}': {e}", file=sys.stderr)
-            sys.exit(1)
+    if args.prompt is not None:
+        prompts.append((None, args.prompt))
+    else:
+        if args.file:
+            prompt_files = [args.file]
+        else:
+            try:
+                prompt_files = [line.strip() for line in read_prompt_file(args.file_list).splitlines()]
+            except FileNotFoundError:
+                print(f"Error: Prompt list file not found at '{args.file_list}'", file=sys.stderr)
+                sys.exit(1)
+            except Exception as e:
+                print(f"Error reading file '{args.file_list}': {e}", file=sys.stderr)
+                sys.exit(1)
+            prompt_files = [path for path in prompt_files if path]
+
+        for path in prompt_files:
+            try:
+                prompts.append((path, read_prompt_file(path)))
+            except FileNotFoundError:
+                print(f"Error: Prompt file not found at '{path}'", file=sys.stderr)
+                sys.exit(1)
+            except Exception as e:
+                print(f"Error reading file '{path}': {e}", file=sys.stderr)
+                sys.exit(1)
+
+    if not prompts:
+        print("Error: No prompts to run.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.cache:
+        global response_cache
+        response_cache = ExactResponseCache()
+
+    # Use the libuv-based event loop when it is installed; it is optional
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
 
     # Run the async core function
     # Note: It's better to wrap the asyncio.run in a try/except block for clean shutdown
     try:
-        asyncio.run(run_query(prompt_content))
+        asyncio.run(run_session(prompts))
     except KeyboardInterrupt:
         print("\nOperation cancelled by user.", file=sys.stderr)
         sys.exit(1)
@@ -1,34 +1,45 @@
 import random
+import sys
 
-# Lists of fruits and vegetables
-fruits = [
+# Tuples of fruits and vegetables
+fruits = (
     "apple", "banana", "cherry", "date", "elderberry",
     "fig", "grape", "honeydew", "kiwi", "lemon",
     "mango", "nectarine", "orange", "peach", "quince",
     "raspberry", "strawberry", "tangerine", "watermelon", "blueberry"
-]
+)
 
-vegetables = [
+vegetables = (
     "carrot", "broccoli", "spinach", "potato", "onion",
     "garlic", "cucumber", "lettuce", "tomato", "pepper",
     "zucchini", "eggplant", "celery", "radish", "beet",
     "asparagus", "cabbage", "cauliflower", "green bean", "peas"
-]
+)
+
+# Item table for each valid choice
+choices = {"fruit": fruits, "vegetable": vegetables}
+
+def _fast_input(prompt=""):
+    """Minimal input(): write the prompt, read one line from stdin."""
+    if prompt:
+        sys.stdout.write(prompt)
+        sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError
+    return line[:-1] if line.endswith("\n") else line
 
 # Ask user for input
-user_choice = input("Do you want a 'vegetable' or a 'fruit'? ").strip().lower()
+user_choice = _fast_input("Do you want a 'vegetable' or a 'fruit'? ").strip().lower()
 
 # Validate input
-while user_choice not in ["vegetable", "fruit"]:
+while user_choice not in choices:
     print("Invalid choice. Please enter 'vegetable' or 'fruit'.")
-    user_choice = input("Do you want a 'vegetable' or a 'fruit'? ").strip().lower()
+    user_choice = _fast_input("Do you want a 'vegetable' or a 'fruit'? ").strip().lower()
 
 # Generate random quantity and item
 quantity = random.randint(10, 30)
-if user_choice == "fruit":
-    item = random.choice(fruits)
-else:
-    item = random.choice(vegetables)
+item = random.choice(choices[user_choice])
 
 # Output the result
 print(f"You get {quantity} {item}(s)!")
@@ -20,6 +20,16 @@ class Tool:
         return f"Tool(name='{self.name}', description='{self.description[:30]}...')"
 
 
+# Block template for one tool; filled in with str.format_map per tool.
+TOOL_TEMPLATE = """
+--- Tool {index}/{count} ---
+* **Name:** {name}
+* **Purpose:** {description}
+* **Inputs:**
+{params}
+"""
+
+
 def format_tools_for_print(tools: List[Tool]) -> str:
     """
     Formats a list of Tool objects into a readable, structured string.
@@ -30,52 +40,42 @@ def format_tools_for_print(tools: List[Tool]) -> str:
     Returns:
         A single string with all tools formatted clearly.
     """
-    formatted_output = "### Available Tools Summary ###\n\n"
+    parts = ["### Available Tools Summary ###\n\n"]
+    count = len(tools)
 
     for i, tool in enumerate(tools):
-        # 1. Tool Name and Separator
-        tool_name = tool.name
-        
-        # 2. Extract and clean description
         # Replace multiple spaces/newlines with a single space for compactness
         description = ' '.join(tool.description.strip().split())
 
-        # 3. Format Input Parameters
         # Get properties from the inputSchema
         properties = tool.inputSchema.get('properties', {})
-        required = tool.inputSchema.get('required', [])
-        
+        required = set(tool.inputSchema.get('required', ()))
+
         params_list = []
         for param_name, schema in properties.items():
-            param_type = schema.get('type', 'Any')
+            # Handle complex types like 'anyOf'
+            if 'anyOf' in schema:
+                param_type = " | ".join([t.get('type') for t in schema['anyOf'] if 'type' in t])
+            else:
+                param_type = schema.get('type', 'Any')
             is_required = '*' if param_name in required else ''
-            
+
             # Get default value if available
             default_val = schema.get('default', None)
             default_str = f" (Default: {default_val})" if default_val is not None else ""
-            
-            # Handle complex types like 'anyOf'
-            if 'anyOf' in schema:
-                param_type = " | ".join([t.get('type') for t in schema['anyOf'] if 'type' in t])
 
-            params_list.append(
-                f"  - {param_name}{is_required}: <{param_type}>{default_str}"
-            )
+            params_list.append(f"  - {param_name}{is_required}: <{param_type}>{default_str}")
 
-        params_str = "\n".join(params_list) if params_list else "  (None)"
-        
-        # Assemble the formatted block for the current tool
-        tool_block = f"""
---- Tool {i + 1}/{len(tools)} ---
-* **Name:** {tool_name}
-* **Purpose:** {description}
-* **Inputs:**
-{params_str}
-"""
-        formatted_output += tool_block
+        parts.append(TOOL_TEMPLATE.format_map({
+            "index": i + 1,
+            "count": count,
+            "name": tool.name,
+            "description": description,
+            "params": "\n".join(params_list) if params_list else "  (None)",
+        }))
 
-    formatted_output += "\n##############################"
-    return formatted_output.strip()
+    parts.append("\n##############################")
+    return "".join(parts).strip()
 
 # --- Example Usage (Using data mocked from your prompt) ---
 
@@ -109,10 +109,10 @@ async def main():
         # Basic server interaction
         await client.ping()
         
-        # List available operations
-        tools = await client.list_tools()
-        resources = await client.list_resources()
-        prompts = await client.list_prompts()
+        # List available operations; the three requests are independent
+        tools, resources, prompts = await asyncio.gather(
+            client.list_tools(), client.list_resources(), client.list_prompts()
+        )
         
         # Execute operations
         #        print(tools)
@@ -122,4 +122,5 @@ async def main():
         print("resouces: ")
         print(resources)
 
-asyncio.run(main())
+if __name__ == "__main__":
+    asyncio.run(main())
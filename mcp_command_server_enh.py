@@ -2,32 +2,74 @@ import os
 import platform
 import sys
 import json
-import base64
 import asyncio
+import codecs
+import concurrent.futures
+import errno
 import logging
+import logging.handlers
 import argparse
+import atexit
+import queue
+import secrets
+import shlex
 import subprocess
-from typing import Dict, Any, List, Optional
-import tomli # Import tomli to load the config
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+try:
+    import tomllib as tomli  # stdlib TOML parser on Python 3.11+, no third-party import
+except ImportError:
+    import tomli  # Import tomli to load the config on older Pythons
+try:
+    import ahocorasick  # optional: single-pass matcher for long prohibited lists
+except ImportError:
+    ahocorasick = None
 import re    # Import re for robust command checking
 from pexpect_auto import PexpectAutomator
 # The user's template uses FastMCP, so we'll import that.
 from fastmcp import FastMCP
 
 # --- Logging setup (from template) ---
+# Records are formatted by the QueueHandler and written to stderr and the log
+# file by a QueueListener thread, so request handlers never block on log I/O.
 LOG_FILE = "mcp_command_server.log"
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stderr), # Log to stderr for visibility
-        logging.FileHandler(LOG_FILE),
-    ],
+
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter that calls strftime at most once per second for %(asctime)s."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._time_cache = (None, "")   # (whole second, formatted time)
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        cached_second, text = self._time_cache
+        if second != cached_second:
+            text = time.strftime(self.default_time_format, self.converter(record.created))
+            self._time_cache = (second, text)
+        return self.default_msec_format % (text, record.msecs)
+
+# The format uses none of these, so skip looking them up for every record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+_log_queue = queue.SimpleQueue()
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(_CachedTimeFormatter("%(asctime)s [%(levelname)s] %(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.StreamHandler(sys.stderr), # Log to stderr for visibility
+    logging.FileHandler(LOG_FILE),
 )
+log_listener.start()
+atexit.register(log_listener.stop)  # drain queued records on shutdown
 logger = logging.getLogger("mcp_command_server")
 
 # --- Configuration Loading ---
 CONFIG_FILE = "config.toml"
+MAX_OUTPUT_BYTES = 10 * 1024 * 1024   # per-stream capture cap when the config sets none
+READ_CHUNK_SIZE = 64 * 1024
 SERVER_CONFIG = {}
 DEFAULT_CONFIG = {
     "command_blocking": {
@@ -39,22 +81,127 @@ DEFAULT_CONFIG = {
         "mcp_command_server.log",
         "pexpect_auto.py",
         "config.toml"
-    ]
+    ],
+    "command_output": {
+        "max_output_bytes": MAX_OUTPUT_BYTES
+    }
 }
 
+# --- Compiled command-blocking settings (rebuilt by compile_command_patterns) ---
+@dataclass(frozen=True, slots=True)
+class BlockingConfig:
+    """The command_blocking and restricted_files settings, resolved once so requests only read attributes."""
+    pattern: Optional[re.Pattern]        # None if there are no prohibited commands
+    prohibited_lower: Tuple[str, ...]    # stripped, lowercased prohibited commands
+    override: bool                       # command_blocking.override from config
+    enabled: bool                        # there are prohibited commands and no override
+    automaton: Any = None                # ahocorasick.Automaton over prohibited_lower, if available
+    restricted_pattern: Optional[re.Pattern] = None   # any restricted file name, or None if there are none
+    first_chars: frozenset = frozenset()  # first character of each prohibited command
+
+_CFG = BlockingConfig(pattern=None, prohibited_lower=(), override=False, enabled=False)
+
+# change_dir moves the server's cwd, so the config path is made absolute at first load
+_config_path = None
+_config_mtime_ns = None      # mtime of the file behind the current SERVER_CONFIG
+
 def load_config():
     """Load configuration from the TOML file."""
-    global SERVER_CONFIG
+    global SERVER_CONFIG, _config_path, _config_mtime_ns
+    if _config_path is None:
+        _config_path = os.path.abspath(CONFIG_FILE)
     try:
-        with open(CONFIG_FILE, "rb") as f:
+        with open(_config_path, "rb") as f:
+            # Recorded even if parsing fails, so a bad file is not re-read per request
+            _config_mtime_ns = os.fstat(f.fileno()).st_mtime_ns
             SERVER_CONFIG = tomli.load(f)
-        logger.info("Configuration loaded successfully from %s", CONFIG_FILE)
+        logger.info("Configuration loaded successfully from %s", _config_path)
     except FileNotFoundError:
         logger.error("Configuration file '%s' not found. Using safe defaults.", CONFIG_FILE)
         SERVER_CONFIG = DEFAULT_CONFIG
     except Exception as e:
         logger.error("Failed to parse configuration file '%s': %s. Using safe defaults.", CONFIG_FILE, e)
         SERVER_CONFIG = DEFAULT_CONFIG
+    compile_command_patterns()
+
+def get_config() -> BlockingConfig:
+    """
+    Return the current blocking config, reloading config.toml if it changed.
+
+    The check is a single stat(); the TOML is only parsed again when the
+    file's mtime differs from the one it was loaded at. If the file can't be
+    stat'ed (e.g. removed), the config already in memory is kept.
+    """
+    if _config_path is None:
+        return _CFG
+    try:
+        mtime_ns = os.stat(_config_path).st_mtime_ns
+    except OSError:
+        return _CFG
+    if mtime_ns != _config_mtime_ns:
+        logger.info("Configuration file %s changed, reloading", _config_path)
+        load_config()
+    return _CFG
+
+def _prohibited_regex(cmd: str) -> str:
+    """
+    Regex for one prohibited entry.
+
+    An entry that starts with a word character must start a word (\\b also
+    matches after '/', '(' and '`', so '/bin/rm', '$(rm ...)' and backtick
+    substitutions are caught). One that ends with a word character must be
+    followed by a space, a dash, a command separator or the end of the input
+    (e.g. 'rm -rf', 'ls; rm', 'sudo'). A side that starts or ends with any
+    other character is a plain substring match, so entries like '/etc/shadow',
+    '> /dev/sda' or 'rm -rf /' still block every command containing them.
+    """
+    regex = re.escape(cmd)
+    if _is_word_char(cmd[0]):
+        regex = r'\b' + regex
+    if _is_word_char(cmd[-1]):
+        regex += r'(?=[\s\-;&|]|$)'
+    return regex
+
+def compile_command_patterns():
+    """Build the command-blocking regex and flags once from the loaded configuration."""
+    global _CFG
+    blocking = SERVER_CONFIG.get("command_blocking", {})
+    prohibited_cmds = blocking.get("prohibited_commands", [])
+    # Missing 'override' means False, maintaining default security.
+    override = bool(blocking.get("override", False))
+
+    # Prepare list for robust checking (e.g., just 'rm', 'mv')
+    cleaned_prohibited = tuple(cmd.strip().lower() for cmd in prohibited_cmds if cmd.strip())
+
+    pattern = None
+    if cleaned_prohibited:
+        pattern = re.compile('|'.join(_prohibited_regex(cmd) for cmd in cleaned_prohibited))
+
+    automaton = None
+    if cleaned_prohibited and ahocorasick is not None:
+        # Finds every prohibited word in one pass, however long the list is;
+        # is_command_blocked then applies the same boundaries as the regex.
+        automaton = ahocorasick.Automaton()
+        for cmd in cleaned_prohibited:
+            automaton.add_word(cmd, cmd)
+        automaton.make_automaton()
+
+    # Restricted files are plain (case-sensitive) substrings; one alternation
+    # finds any of them in a single scan of the command.
+    restricted_files = SERVER_CONFIG.get("restricted_files", [])
+    restricted_pattern = re.compile(
+        '|'.join(re.escape(name) for name in restricted_files)
+    ) if restricted_files else None
+
+    _CFG = BlockingConfig(
+        pattern=pattern,
+        prohibited_lower=cleaned_prohibited,
+        override=override,
+        enabled=pattern is not None and not override,
+        automaton=automaton,
+        restricted_pattern=restricted_pattern,
+        first_chars=frozenset(cmd[0] for cmd in cleaned_prohibited),
+    )
 
 # --- Command Execution Logic (from mcp-server-commands) ---
 class ExecResult:
@@ -67,107 +214,218 @@ class ExecResult:
 # --- FUNCTION FOR COMMAND BLOCKING ---
 def is_command_blocked(command: str) -> bool:
     """Checks if a command contains prohibited substrings loaded from config."""
-    prohibited_cmds = SERVER_CONFIG.get("command_blocking", {}).get("prohibited_commands", [])
-
-    # 1. Prepare list for robust checking (e.g., just 'rm', 'mv')
-    cleaned_prohibited = [cmd.strip() for cmd in prohibited_cmds]
-
-    if not cleaned_prohibited:
+    cfg = _CFG
+    if not cfg.enabled:
         return False
-
-    # Pattern to catch command followed by space or dash (e.g., 'rm -rf')
-    pattern = r'\b(' + '|'.join(re.escape(cmd) for cmd in cleaned_prohibited) + r')[\s-]'
-
-    # Check command parts (for 'command1 && command2')
-    command_parts = re.split(r'[;&|]+', command)
-    command_lower = command.lower()
-    for part in command_parts:
-        # Check against the robust regex pattern
-        if re.search(pattern, part.strip().lower()):
+    # One scan covers every part of 'command1 && command2' style input
+    command = command.lower()
+    # A match has to start with one of these characters, so a command that
+    # contains none of them (e.g. 'pwd' with the default list) skips the matcher
+    if cfg.first_chars.isdisjoint(command):
+        return False
+    if cfg.automaton is None:
+        return cfg.pattern.search(command) is not None
+    for end, cmd in cfg.automaton.iter(command):
+        if _is_whole_command(command, cmd, end - len(cmd) + 1, end + 1):
             return True
+    return False
 
-    # 2. Check the original strict match
-    for block in prohibited_cmds:
-        if block in command_lower:
-            return True
+_COMMAND_END_CHARS = frozenset("-;&|")
 
-    return False
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+def _is_whole_command(command: str, cmd: str, start: int, end: int) -> bool:
+    """Boundary check for an automaton hit of cmd, equivalent to _prohibited_regex(cmd)."""
+    if _is_word_char(cmd[0]) and start > 0 and _is_word_char(command[start - 1]):
+        return False
+    if not _is_word_char(cmd[-1]):
+        return True
+    return end == len(command) or command[end].isspace() or command[end] in _COMMAND_END_CHARS
 
 def is_restricted_file_access(command: str) -> bool:
     """Checks if a command involves accessing restricted files."""
-    restricted_files = SERVER_CONFIG.get("restricted_files", [])
-    for restricted_file in restricted_files:
-        # logger.info("restricted1 file %s", restricted_file )
-        if command.find(restricted_file) > -1:
-            return True
-    return False
+    restricted_pattern = _CFG.restricted_pattern
+    return restricted_pattern is not None and restricted_pattern.search(command) is not None
 
 def check_override() -> bool:
     """Checks if the command execution override is enabled in the config."""
-    # Returns False if 'command_blocking' or 'override' key is missing, maintaining default security.
-    return SERVER_CONFIG.get("command_blocking", {}).get("override", False)
+    return _CFG.override
 
 # ----------------------------------------------------
+# Anything a shell would interpret (operators, redirection, expansion, quoting,
+# globbing, comments, env assignments) sends a command through /bin/sh. So does
+# '\r', which shlex.split() treats as whitespace but sh does not.
+_SHELL_META_RE = re.compile(r'[;&|<>$`(){}*?\[\]"\'\\~=#\n\r]')
+# Shell builtins have no executable to exec (or behave differently outside sh),
+# and reserved words ('! false', 'time ls', 'if ...') only mean anything to a shell.
+_SHELL_BUILTINS = frozenset({
+    ".", ":", "alias", "bg", "break", "builtin", "cd", "command", "continue",
+    "eval", "exec", "exit", "export", "fg", "getopts", "hash", "jobs", "local",
+    "read", "readonly", "return", "set", "shift", "source", "times", "trap",
+    "type", "ulimit", "umask", "unalias", "unset", "wait",
+    # reserved words
+    "!", "case", "do", "done", "elif", "else", "esac", "fi", "for", "function",
+    "if", "in", "select", "then", "time", "until", "while",
+})
+
 async def fish_workaround(interpreter: str, stdin: str, options: Dict[str, Any]) -> ExecResult:
-    """A specific workaround for piping stdin to the fish shell."""
-    base64_stdin = base64.b64encode(stdin.encode('utf-8')).decode('utf-8')
-    command = f'{interpreter} -c "echo {base64_stdin} | base64 -d | fish"'
-    logger.info("Using fish workaround command: %s", interpreter)
+    """
+    A specific workaround for piping stdin to the fish shell.
 
-    proc = await asyncio.create_subprocess_shell(
-        command,
+    fish is started directly (no intermediate sh -c) and the script is written
+    to its stdin pipe as-is, rather than being base64-encoded onto the command
+    line and decoded by a second process.
+    """
+    logger.debug("Using fish workaround command: %s", interpreter)
+
+    proc = await asyncio.create_subprocess_exec(
+        *shlex.split(interpreter),
+        stdin=asyncio.subprocess.PIPE,
         stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, **options
     )
-    stdout, stderr = await proc.communicate()
-    return ExecResult(stdout.decode('utf-8'), stderr.decode('utf-8'), proc.returncode)
+    return await collect_output(proc, stdin)
+
+def get_max_output_bytes() -> int:
+    """Per-stream cap on captured command output, from config."""
+    return SERVER_CONFIG.get("command_output", {}).get("max_output_bytes", MAX_OUTPUT_BYTES)
+
+async def _drain(stream: asyncio.StreamReader, limit: int) -> Tuple[str, bool]:
+    """
+    Read a pipe to EOF, decoding incrementally and keeping at most limit bytes.
+
+    Output past the limit is still read (so the child never blocks on a full
+    pipe) but discarded. Invalid UTF-8 (e.g. binary output) is replaced with
+    U+FFFD. Returns the decoded text and whether it was truncated.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    parts = []
+    kept = 0
+    truncated = False
+    while True:
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        if kept < limit:
+            if kept + len(chunk) > limit:
+                chunk = chunk[:limit - kept]
+                truncated = True
+            kept += len(chunk)
+            parts.append(decoder.decode(chunk))
+        else:
+            truncated = True
+    if not kept:
+        return "", truncated    # nothing was written: skip the decoder flush
+    # A multi-byte character cut off by the limit is dropped rather than replaced
+    parts.append(decoder.decode(b"", final=not truncated))
+    return "".join(parts), truncated
+
+async def _feed(pipe: Optional[asyncio.StreamWriter], data: Optional[str]) -> None:
+    """Write data to the child's stdin and close it."""
+    if pipe is None:
+        return
+    try:
+        if data:
+            pipe.write(data.encode('utf-8'))
+            await pipe.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # the child exited without reading all of its input
+    finally:
+        pipe.close()
+
+async def collect_output(proc: asyncio.subprocess.Process, stdin: Optional[str] = None) -> ExecResult:
+    """Feed stdin and stream stdout/stderr of a running process into an ExecResult."""
+    limit = get_max_output_bytes()
+    (stdout, out_truncated), (stderr, err_truncated), _ = await asyncio.gather(
+        _drain(proc.stdout, limit), _drain(proc.stderr, limit), _feed(proc.stdin, stdin)
+    )
+    await proc.wait()
+    for name, truncated in (("stdout", out_truncated), ("stderr", err_truncated)):
+        if truncated:
+            stderr += f"\n[{name} truncated to {limit} bytes]\n"
+    return ExecResult(stdout, stderr, proc.returncode)
 
 async def exec_command(command: str, stdin: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> ExecResult:
     """Executes a shell command asynchronously, capturing its output."""
     options = options or {}
     try:
         # Apply the fish shell workaround if needed
-        if command.split(" ")[0] == "fish" and stdin:
+        if stdin and (command == "fish" or command.startswith(("fish ", "fish\t"))):
             return await fish_workaround(command, stdin, options)
-        proc = await asyncio.create_subprocess_shell(
-            command,
-            stdin=asyncio.subprocess.PIPE if stdin else None,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            **options
-        )
-        stdout_bytes, stderr_bytes = await proc.communicate(
-            input=stdin.encode('utf-8') if stdin else None
-        )
-        return ExecResult(stdout_bytes.decode('utf-8'), stderr_bytes.decode('utf-8'), proc.returncode)
+        pipes = {
+            "stdin": asyncio.subprocess.PIPE if stdin else None,
+            "stdout": asyncio.subprocess.PIPE,
+            "stderr": asyncio.subprocess.PIPE,
+        }
+        # Splits on space, tab and newline only, as sh does (str.split() would
+        # also split on NBSP and other Unicode whitespace)
+        argv = shlex.split(command) if not _SHELL_META_RE.search(command) else None
+        proc = None
+        if argv and argv[0] not in _SHELL_BUILTINS:
+            # Plain 'program arg ...' with nothing for a shell to interpret:
+            # exec it directly and skip the /bin/sh process.
+            try:
+                proc = await asyncio.create_subprocess_exec(*argv, **pipes, **options)
+            except OSError as e:
+                if e.errno != errno.ENOEXEC:
+                    raise
+                # An executable with no #! line: sh runs it as a shell script
+        if proc is None:
+            proc = await asyncio.create_subprocess_shell(command, **pipes, **options)
+        return await collect_output(proc, stdin)
     except FileNotFoundError:
         return ExecResult("", f"Command not found: {command}\n", 127)
+    except PermissionError:
+        return ExecResult("", f"Permission denied: {command}\n", 126)
     except Exception as e:
         logger.error("exec_command failed unexpectedly for command '%s': %s", command, e)
         return ExecResult("", str(e), 1)
 
+_RESULT_FIELDS = (("stdout", "STDOUT"), ("stderr", "STDERR"))
+
 def format_result_messages(result: ExecResult) -> List[Dict[str, Any]]:
     """Formats the execution result into a list of MCP content dictionaries."""
-    messages = []
-    if result.code is not None:
-        messages.append({"type": "text", "text": str(result.code), "name": "EXIT_CODE"})
-    if result.stdout:
-        messages.append({"type": "text", "text": result.stdout, "name": "STDOUT"})
-    if result.stderr:
-        messages.append({"type": "text", "text": result.stderr, "name": "STDERR"})
+    messages = [] if result.code is None else [
+        {"type": "text", "text": str(result.code), "name": "EXIT_CODE"}
+    ]
+    messages += [
+        {"type": "text", "text": text, "name": name}
+        for attr, name in _RESULT_FIELDS
+        if (text := getattr(result, attr))
+    ]
     return messages
 
+# Denials never vary, so the responses are built once; FastMCP only serializes them.
+_BLOCKED_RESPONSE = {
+    "content": [
+        {"type": "text", "text": "1", "name": "EXIT_CODE"},
+        {"type": "text", "text": "This server is not authorized to run these commands\n", "name": "STDERR"},
+    ],
+    "is_error": True
+}
+_RESTRICTED_RESPONSE = {
+    "content": [
+        {"type": "text", "text": "1", "name": "EXIT_CODE"},
+        {"type": "text", "text": "This server is not authorized to access restricted files\n", "name": "STDERR"},
+    ],
+    "is_error": True
+}
+
 # --- MCP Server Initialization ---
 mcp = FastMCP("mcp-server-commands")
 
+# Host details never change while the server runs, so they are read once at import
+_SYSTEM_INFO = {
+    "os_name": platform.system(),
+    "os_release": platform.release(),
+    "architecture": platform.machine()
+}
+
 @mcp.resource("resource://system_info")
 def system_info() -> Dict[str, str]:
     """Provides basic information about the host operating system."""
-    logger.info("system_info() called")
-    return {
-        "os_name": platform.system(),
-        "os_release": platform.release(),
-        "architecture": platform.machine()
-    }
+    logger.debug("system_info() called")
+    return _SYSTEM_INFO
 
 @mcp.tool
 async def run_command(
@@ -188,30 +446,16 @@ async def run_command(
     """
     logger.info("Received run_command request: command='%s', workdir='%s'", command, workdir)
 
-    blocked_feedback = "This server is not authorized to run these commands"
-    restricted_feedback = "This server is not authorized to access restricted files"
-
     # --- RESTRICTION BYPASS LOGIC ---
-    if check_override():
+    cfg = get_config()
+    if cfg.override:
         logger.warning("Command restrictions bypassed via config override.")
-    elif is_command_blocked(command):
+    elif cfg.enabled and is_command_blocked(command):
         logger.warning("Blocked command denied: '%s'", command)
-        return {
-            "content": [
-                {"type": "text", "text": "1", "name": "EXIT_CODE"},
-                {"type": "text", "text": blocked_feedback + "\n", "name": "STDERR"},
-            ],
-            "is_error": True
-        }
+        return _BLOCKED_RESPONSE
     elif is_restricted_file_access(command):
         logger.warning("Restricted file access denied: '%s'", command)
-        return {
-            "content": [
-                {"type": "text", "text": "1", "name": "EXIT_CODE"},
-                {"type": "text", "text": restricted_feedback + "\n", "name": "STDERR"},
-            ],
-            "is_error": True
-        }
+        return _RESTRICTED_RESPONSE
     # --------------------------------
     options = {"cwd": workdir} if workdir else {}
     exec_result = await exec_command(command, stdin, options)
@@ -225,6 +469,214 @@ async def run_command(
         "is_error": is_error
     }
 
+# --- Batch shell for run_commands ---
+# Each run_commands call runs its whole batch in one bash fed over stdin, so a
+# burst of short commands pays for a single process start instead of one per
+# command. A new bash is used per call, so nothing one batch defines (variables,
+# functions, cd) leaks into the next. After each command the shell prints an end
+# marker carrying a per-shell random token and the exit status; output is read
+# up to that marker.
+_BATCH_DELIM = "\x1e"
+SHELL_EXIT_TIMEOUT = 1.0     # seconds to wait for the shell's exit status after its stdout closes
+
+class BatchShell:
+    """One bash process that runs a run_commands batch, one command at a time."""
+    def __init__(self):
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.marker = b""
+
+    async def start(self) -> None:
+        """Start a fresh bash (raises OSError if it can't be started)."""
+        self.proc = await asyncio.create_subprocess_exec(
+            "bash", "--noprofile", "--norc", "-s",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self.marker = f"{_BATCH_DELIM}{secrets.token_hex(8)}:".encode()
+        logger.debug("Started batch shell (pid %d)", self.proc.pid)
+
+    def drop(self) -> None:
+        """Forget (and kill, if still running) a shell that can't be used again."""
+        if self.proc is not None and self.proc.returncode is None:
+            self.proc.kill()
+        self.proc = None
+
+    async def close(self) -> None:
+        """End the shell at the end of a batch: EOF on stdin, killed if it lingers."""
+        if self.proc is None:
+            return
+        self.proc.stdin.close()
+        try:
+            await asyncio.wait_for(self.proc.wait(), SHELL_EXIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.drop()
+
+    async def run(self, command: str) -> ExecResult:
+        """
+        Run one command; stderr is merged into stdout.
+
+        Only starting a shell can raise (OSError). Once the command has been
+        written it is never retried, so any later failure becomes its result.
+        If the command ends the shell, the next one gets a fresh shell.
+        """
+        if self.proc is None:
+            await self.start()
+        shell = self.proc
+        limit = get_max_output_bytes()
+        # eval keeps a malformed command (e.g. an unclosed quote) from leaving the
+        # shell waiting for more input; it just fails with status 2.
+        shell.stdin.write(
+            f"eval {shlex.quote(command)} </dev/null 2>&1; "
+            f"printf '\\036%s%s\\036\\n' {self.marker[1:].decode()} $?\n".encode()
+        )
+        stderr = ""
+        try:
+            try:
+                await shell.stdin.drain()
+                output, code, truncated = await _read_to_marker(shell.stdout, self.marker, limit)
+            except (BrokenPipeError, ConnectionResetError):
+                output, code, truncated = "", None, False
+            if code is None:
+                # stdout closed before the marker: the command either ended the shell
+                # ('exit 3') or pointed its stdout elsewhere ('exec >/dev/null'), in
+                # which case bash is still running. Take the exit status if it exits
+                # promptly; either way this shell can't be used again.
+                try:
+                    code = await asyncio.wait_for(shell.wait(), SHELL_EXIT_TIMEOUT)
+                except asyncio.TimeoutError:
+                    code = 1
+                    stderr = "The shell's stdout was closed or redirected; the shell was restarted\n"
+                self.drop()
+        except Exception as e:
+            logger.error("Batch shell failed for command '%s': %s", command, e)
+            self.drop()
+            return ExecResult("", str(e), 1)
+        except BaseException:
+            # Cancelled mid-command: the shell's output position is unknown now
+            self.drop()
+            raise
+        if truncated:
+            stderr += f"\n[stdout truncated to {limit} bytes]\n"
+        return ExecResult(output, stderr, code)
+
+async def _read_to_marker(stream: asyncio.StreamReader, marker: bytes, limit: int) -> Tuple[str, Optional[int], bool]:
+    """
+    Read one command's output from the batch shell up to its end marker.
+
+    Returns the decoded output (at most limit bytes kept), the exit status and
+    whether the output was truncated. The status is None if the shell exited
+    before printing the marker.
+    """
+    code = None
+    buf = bytearray()
+    out = bytearray()
+    truncated = False
+    while True:
+        start = buf.find(marker)
+        if start != -1:
+            end = buf.find(_BATCH_DELIM.encode() + b"\n", start + len(marker))
+            if end != -1:
+                code = int(buf[start + len(marker):end])
+                del buf[start:]
+                break
+        elif len(buf) > len(marker):
+            # Nothing before the last len(marker) bytes can start a marker
+            keep = len(buf) - len(marker)
+            room = max(limit - len(out), 0)
+            out += buf[:min(keep, room)]
+            truncated = truncated or keep > room
+            del buf[:keep]
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        buf += chunk
+    room = max(limit - len(out), 0)
+    out += buf[:room]
+    truncated = truncated or len(buf) > room
+    return (out.decode("utf-8", "replace") if out else ""), code, truncated
+
+async def _run_batch(commands: List[str]) -> List[ExecResult]:
+    """Run already-vetted commands in order, in one batch shell when possible."""
+    results = []
+    shell = BatchShell()
+    try:
+        use_shell = True
+        for command in commands:
+            if use_shell:
+                try:
+                    results.append(await shell.run(command))
+                    continue
+                except OSError as e:
+                    logger.warning("Batch shell unavailable (%s); running commands one by one", e)
+                    use_shell = False
+            results.append(await exec_command(command))
+    finally:
+        await shell.close()
+    return results
+
+@mcp.tool
+async def run_commands(commands: List[str]) -> Dict[str, Any]:
+    """
+    Run several short shell commands in one go and get each one's output.
+
+    The commands run in order in a single bash session, which is much cheaper
+    than one run_command call per command. The batch starts in the current
+    directory with a fresh shell; a 'cd' or variable set by one command is seen
+    by the ones after it, but not by later run_commands calls. Commands get no
+    stdin, and their stderr is merged into their stdout.
+
+    Args:
+        commands: The shell commands to execute, in order.
+
+    Returns:
+        A dictionary whose content lists, per command, a COMMAND entry followed by
+        its exit code and output, plus an overall error status.
+    """
+    logger.info("Received run_commands request: %d commands", len(commands))
+    cfg = get_config()
+
+    # Vet every command first; only the allowed ones go to the shell
+    denials: Dict[int, Dict[str, Any]] = {}
+    for i, command in enumerate(commands):
+        if _BATCH_DELIM in command:
+            denials[i] = {"content": format_result_messages(ExecResult(
+                "", "Commands may not contain the \\x1e control character\n", 1)), "is_error": True}
+        elif cfg.override:
+            continue
+        elif cfg.enabled and is_command_blocked(command):
+            logger.warning("Blocked command denied: '%s'", command)
+            denials[i] = _BLOCKED_RESPONSE
+        elif is_restricted_file_access(command):
+            logger.warning("Restricted file access denied: '%s'", command)
+            denials[i] = _RESTRICTED_RESPONSE
+    if cfg.override:
+        logger.warning("Command restrictions bypassed via config override.")
+
+    allowed = [command for i, command in enumerate(commands) if i not in denials]
+    exec_results = iter(await _run_batch(allowed)) if allowed else iter(())
+
+    content: List[Dict[str, Any]] = []
+    is_error = False
+    for i, command in enumerate(commands):
+        content.append({"type": "text", "text": command, "name": "COMMAND"})
+        if i in denials:
+            content += denials[i]["content"]
+            is_error = True
+            continue
+        exec_result = next(exec_results)
+        if exec_result.code != 0:
+            logger.warning("Command '%s' failed with exit code %d", command, exec_result.code)
+            is_error = True
+        content += format_result_messages(exec_result)
+
+    return {
+        "content": content,
+        "is_error": is_error
+    }
+
 @mcp.tool
 async def get_current_dir() -> str:
     """
@@ -233,23 +685,16 @@ async def get_current_dir() -> str:
     returns str ->  directory ( ex "/home/user1"
     """
     current_dir = os.getcwd()
-    logger.info("Received get_current_dir requst:  current dir is '%s'", current_dir )
+    logger.debug("Received get_current_dir requst:  current dir is '%s'", current_dir )
     return current_dir
 
-@mcp.tool
-async def change_dir(c_dir: str) -> str:
-    """Change the directory to specified string relative and absolute paths are supported
-
-    If error - will return string "error: invalid directory"
-    """
-    logger.info("Received change_dir request: '%s'", c_dir)
-
-    # Expand $HOME to the full home directory path
-    if "$HOME" in c_dir:
-        home_dir = os.environ.get('HOME', '')
-        expanded_dir = c_dir.replace("$HOME", home_dir)
-    else:
-        expanded_dir = os.path.expanduser(c_dir)
+def _change_dir_impl(c_dir: str) -> str:
+    """Blocking part of change_dir: expand the path and chdir into it."""
+    # Expand $HOME (and any other environment variable) and ~ to full paths;
+    # most paths have neither, so skip the expansion calls for those
+    expanded_dir = os.path.expandvars(c_dir) if '$' in c_dir else c_dir
+    if '~' in expanded_dir:
+        expanded_dir = os.path.expanduser(expanded_dir)
 
     try:
         # Attempt to change the directory
@@ -260,8 +705,29 @@ async def change_dir(c_dir: str) -> str:
         logger.info("invalid dir: '%s'", expanded_dir)
         return "error: invalid directory"
 
+@mcp.tool
+async def change_dir(c_dir: str) -> str:
+    """Change the directory to specified string relative and absolute paths are supported
+
+    If error - will return string "error: invalid directory"
+    """
+    logger.debug("Received change_dir request: '%s'", c_dir)
+    # chdir (and a ~user lookup) can stall on slow filesystems; keep it off the event loop
+    return await asyncio.to_thread(_change_dir_impl, c_dir)
+
+# Bounded pool for pexpect sessions: each one blocks a thread for the whole
+# interaction, so they run here instead of on the event loop.
+EXPECT_MAX_WORKERS = 8
+_EXPECT_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=EXPECT_MAX_WORKERS, thread_name_prefix="pexpect"
+)
+
+def _run_pexpect(program: str, tuple_actions: List[Tuple[str, str]]) -> Optional[str]:
+    """Run one PexpectAutomator session to completion (blocking)."""
+    return PexpectAutomator(program, tuple_actions).run()
+
 @mcp.tool()
-def run_expect_script(
+async def run_expect_script(
     program: str,
     actions: list[dict[str, str]]
 ) -> str:
@@ -280,7 +746,8 @@ def run_expect_script(
     """
 
     logger.info("running pexpect for pgm : '%s'", program )
-    logger.info("Actions: %s", json.dumps(actions, indent=2))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Actions: %s", json.dumps(actions))
     # Translate from dicts to your internal format
     tuple_actions = []
     for act_d in actions:
@@ -290,8 +757,8 @@ def run_expect_script(
         if act not in ("expect", "send"):
             raise ValueError(f"Invalid action {act}")
         tuple_actions.append((act, text))
-    autom = PexpectAutomator(program, tuple_actions)
-    output = autom.run()
+    loop = asyncio.get_running_loop()
+    output = await loop.run_in_executor(_EXPECT_EXECUTOR, _run_pexpect, program, tuple_actions)
     if output is None:
         # You could choose to raise, or return error info
         raise RuntimeError("PexpectAutomator failed")
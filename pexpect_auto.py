@@ -1,4 +1,5 @@
 import logging
+import re
 import pexpect
 
 class PexpectAutomator:
@@ -15,11 +16,16 @@ class PexpectAutomator:
             actions (list[tuple]): A list of tuples, where each tuple is ('expect', text) or ('send', text).
         """
         self.program = program
-        self.actions = actions
+        # Compile expect patterns once, with the same DOTALL flag pexpect uses for
+        # str patterns, so run() doesn't recompile them on every expect call.
+        self.actions = [
+            (action, re.compile(text, re.DOTALL) if action == 'expect' and isinstance(text, str) else text)
+            for action, text in actions
+        ]
         self.child = None
         self.output = None
         self.logger = logging.getLogger(__name__)
-        self.logger.info("Initializing PexpectAutomator for program: '%s'", program)
+        self.logger.debug("Initializing PexpectAutomator for program: '%s'", program)
         self.logger.debug("Actions: %s", actions)
 
     def run(self):
@@ -29,26 +35,26 @@ class PexpectAutomator:
         Returns:
             str: The captured output as a string, or None if an error occurs.
         """
-        self.logger.info("Starting program: '%s'", self.program)
+        self.logger.debug("Starting program: '%s'", self.program)
         try:
             # Start the program
             self.child = pexpect.spawn(self.program, encoding='utf-8')
-            self.logger.info("Program spawned with PID: %d", self.child.pid)
+            self.logger.debug("Program spawned with PID: %d", self.child.pid)
 
             for action, text in self.actions:
                 self.logger.debug("Processing action: %s, text: %s", action, text)
                 if action == 'expect':
-                    self.logger.info("Waiting for text: '%s'", text)
+                    self.logger.debug("Waiting for text: '%s'", getattr(text, 'pattern', text))
                     self.child.expect(text)
                 elif action == 'send':
-                    self.logger.info("Sending text: '%s'", text)
+                    self.logger.debug("Sending text: '%s'", text)
                     self.child.sendline(text)
                 else:
                     raise ValueError(f"Unknown action: {action}")
 
             # Capture the remaining output
             self.output = self.child.read()
-            self.logger.info("Captured output: %s", self.output)
+            self.logger.debug("Captured output: %s", self.output)
             return self.output
 
         except pexpect.ExceptionPexpect as e:
@@ -62,6 +68,6 @@ class PexpectAutomator:
             return None
         finally:
             if self.child and self.child.isalive():
-                self.logger.info("Closing child process (PID: %d)", self.child.pid)
+                self.logger.debug("Closing child process (PID: %d)", self.child.pid)
                 self.child.close()
 
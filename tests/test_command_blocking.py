@@ -0,0 +1,73 @@
+import dataclasses
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mcp_command_server_enh as server
+
+# (prohibited_commands, command, expected is_command_blocked result)
+CASES = [
+    # Word entries match whole words, anywhere in the command
+    (["rm ", "mv ", "sudo ", "su "], "rm -rf x", True),
+    (["rm ", "mv ", "sudo ", "su "], "ls; rm -rf x", True),
+    (["rm ", "mv ", "sudo ", "su "], "echo hi && mv a b", True),
+    (["rm ", "mv ", "sudo ", "su "], "/bin/rm -rf x", True),
+    (["rm ", "mv ", "sudo ", "su "], "$(rm -rf x)", True),
+    (["rm ", "mv ", "sudo ", "su "], "echo `rm -rf x`", True),
+    (["rm ", "mv ", "sudo ", "su "], "SUDO ls", True),
+    (["rm ", "mv ", "sudo ", "su "], "ls|sudo x", True),
+    (["rm ", "mv ", "sudo ", "su "], "rm\tx", True),
+    # Bare trailing words are blocked
+    (["rm ", "mv ", "sudo ", "su "], "rm", True),
+    (["rm ", "mv ", "sudo ", "su "], "sudo", True),
+    (["rm ", "mv ", "sudo ", "su "], "echo mv", True),
+    # ...but not as part of another word
+    (["rm ", "mv ", "sudo ", "su "], "echo farm x", False),
+    (["rm ", "mv ", "sudo ", "su "], "xrm -f", False),
+    (["rm ", "mv ", "sudo ", "su "], "summary", False),
+    (["rm ", "mv ", "sudo ", "su "], "ls -al", False),
+    (["dd"], "ADD x", False),
+    (["dd"], "dd if=/dev/zero", True),
+    (["git push"], "git push origin", True),
+    # Entries that start or end with a non-word character match as substrings
+    (["/etc/shadow"], "cat /etc/shadow", True),
+    (["> /dev/sda"], "echo x > /dev/sda", True),
+    (["rm -rf /"], "rm -rf /tmp", True),
+    (["rm -rf /"], "rm -rf tmp", False),
+    # Nothing prohibited
+    ([], "rm -rf x", False),
+]
+
+
+class CommandBlockingTest(unittest.TestCase):
+
+    def tearDown(self):
+        server.SERVER_CONFIG = {}
+        server.compile_command_patterns()
+
+    def check_cases(self, use_automaton):
+        for prohibited, command, expected in CASES:
+            server.SERVER_CONFIG = {"command_blocking": {"prohibited_commands": prohibited}}
+            server.compile_command_patterns()
+            if not use_automaton:
+                server._CFG = dataclasses.replace(server._CFG, automaton=None)
+            with self.subTest(prohibited=prohibited, command=command):
+                self.assertEqual(server.is_command_blocked(command), expected)
+
+    def test_regex(self):
+        self.check_cases(use_automaton=False)
+
+    @unittest.skipIf(server.ahocorasick is None, "pyahocorasick is not installed")
+    def test_automaton(self):
+        self.check_cases(use_automaton=True)
+
+    def test_override_disables_blocking(self):
+        server.SERVER_CONFIG = {"command_blocking": {"prohibited_commands": ["rm"], "override": True}}
+        server.compile_command_patterns()
+        self.assertFalse(server.is_command_blocked("rm -rf x"))
+
+
+if __name__ == "__main__":
+    unittest.main()
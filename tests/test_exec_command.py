@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mcp_command_server_enh as server
+
+# IsolatedAsyncioTestCase runs the loop in debug mode, which logs every subprocess
+logging.getLogger("asyncio").setLevel(logging.WARNING)
+
+
+class ExecCommandTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    async def run_tracked(self, command, **kwargs):
+        """Run exec_command and report which subprocess path(s) it took."""
+        with mock.patch.object(server.asyncio, "create_subprocess_exec",
+                               wraps=asyncio.create_subprocess_exec) as exec_, \
+             mock.patch.object(server.asyncio, "create_subprocess_shell",
+                               wraps=asyncio.create_subprocess_shell) as shell:
+            result = await server.exec_command(command, **kwargs)
+        return result, exec_.called, shell.called
+
+    async def test_plain_command_is_execed(self):
+        result, used_exec, used_shell = await self.run_tracked("echo hello world")
+        self.assertEqual((result.code, result.stdout), (0, "hello world\n"))
+        self.assertTrue(used_exec)
+        self.assertFalse(used_shell)
+
+    async def test_shell_syntax_goes_through_sh(self):
+        for command, stdout in [("echo a; echo b", "a\nb\n"), ("echo 'a  b'", "a  b\n"),
+                                ("X=1 env", None), ("echo $0", None)]:
+            with self.subTest(command=command):
+                result, used_exec, used_shell = await self.run_tracked(command)
+                self.assertEqual(result.code, 0)
+                if stdout is not None:
+                    self.assertEqual(result.stdout, stdout)
+                self.assertFalse(used_exec)
+                self.assertTrue(used_shell)
+
+    async def test_builtins_and_reserved_words_go_through_sh(self):
+        for command, code in [("! false", 0), ("! true", 1), ("cd /", 0), ("exit 3", 3)]:
+            with self.subTest(command=command):
+                result, used_exec, used_shell = await self.run_tracked(command)
+                self.assertEqual(result.code, code)
+                self.assertFalse(used_exec)
+                self.assertTrue(used_shell)
+
+    async def test_unicode_whitespace_is_not_a_separator(self):
+        name = os.path.join(self.tmpdir, "my file.txt")
+        with open(name, "w") as f:
+            f.write("contents\n")
+        result, used_exec, _ = await self.run_tracked(f"cat {name}")
+        self.assertEqual((result.code, result.stdout), (0, "contents\n"))
+        self.assertTrue(used_exec)
+
+    async def test_script_without_shebang_falls_back_to_sh(self):
+        script = os.path.join(self.tmpdir, "noshebang")
+        with open(script, "w") as f:
+            f.write("echo from script\n")
+        os.chmod(script, 0o755)
+        result, used_exec, used_shell = await self.run_tracked(script)
+        self.assertEqual((result.code, result.stdout), (0, "from script\n"))
+        self.assertTrue(used_exec)
+        self.assertTrue(used_shell)
+
+    async def test_missing_program(self):
+        result, _, used_shell = await self.run_tracked("no-such-program-xyz arg")
+        self.assertEqual(result.code, 127)
+        self.assertFalse(used_shell)
+
+
+if __name__ == "__main__":
+    unittest.main()
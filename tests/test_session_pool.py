@@ -0,0 +1,128 @@
+import contextlib
+import io
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp import McpError
+from mcp.types import ErrorData
+
+import command_cli_enh as cli
+
+
+class FakeClient:
+    """Stands in for fastmcp.Client without spawning the server."""
+
+    def __init__(self, server_path):
+        self.session = SimpleNamespace(list_tools=None)
+        self.connected = False
+        self.closed = False
+
+    async def __aenter__(self):
+        self.connected = True
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.connected = False
+        self.closed = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def ping(self):
+        return True
+
+
+class FailingGemini:
+    """A Gemini client whose generate_content_stream always raises exc."""
+
+    def __init__(self, exc):
+        async def generate_content_stream(**kwargs):
+            raise exc
+        self.aio = SimpleNamespace(models=SimpleNamespace(
+            generate_content_stream=generate_content_stream))
+
+
+class SessionPoolTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        patcher = mock.patch("fastmcp.Client", FakeClient)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = cli.MCPSessionPool("server.py")
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    async def test_shared_session_is_reused(self):
+        first = await self.pool.acquire()
+        second = await self.pool.acquire()
+        self.assertIs(first, second)
+        await self.pool.release(first)
+        await self.pool.release(second)
+        self.assertFalse(first.closed)
+
+    async def test_invalidated_session_closes_on_last_release(self):
+        good = await self.pool.acquire()
+        bad = await self.pool.acquire()
+        await self.pool.invalidate(bad)
+        self.assertFalse(good.closed)
+
+        fresh = await self.pool.acquire()
+        self.assertIsNot(fresh, good)
+
+        await self.pool.release(bad)
+        self.assertFalse(good.closed)
+        await self.pool.release(good)
+        self.assertTrue(good.closed)
+        await self.pool.release(fresh)
+        self.assertFalse(fresh.closed)
+
+    async def test_expired_session_in_use_is_not_dropped(self):
+        held = await self.pool.acquire()
+        self.pool._last_used -= self.pool.ttl + 1
+        again = await self.pool.acquire()
+        self.assertIs(again, held)
+        self.assertFalse(held.closed)
+        await self.pool.release(held)
+        await self.pool.release(again)
+
+    async def test_expired_idle_session_is_replaced(self):
+        old = await self.pool.acquire()
+        await self.pool.release(old)
+        self.pool._last_used -= self.pool.ttl + 1
+        new = await self.pool.acquire()
+        self.assertIsNot(new, old)
+        self.assertTrue(old.closed)
+        await self.pool.release(new)
+
+    async def run_failing_query(self, exc):
+        with contextlib.redirect_stdout(io.StringIO()), \
+             contextlib.redirect_stderr(io.StringIO()):
+            await cli.run_query("hi", pool=self.pool, gemini=FailingGemini(exc))
+
+    async def test_gemini_error_keeps_session(self):
+        client = await self.pool.acquire()
+        await self.run_failing_query(RuntimeError("429 RESOURCE_EXHAUSTED"))
+        self.assertIs(await self.pool.acquire(), client)
+        await self.pool.release(client)
+        await self.pool.release(client)
+        self.assertFalse(client.closed)
+
+    async def test_mcp_error_recycles_session(self):
+        client = await self.pool.acquire()
+        await self.run_failing_query(McpError(ErrorData(code=-32000, message="closed")))
+        self.assertFalse(client.closed)   # still held by the acquire() above
+        fresh = await self.pool.acquire()
+        self.assertIsNot(fresh, client)
+        await self.pool.release(client)
+        self.assertTrue(client.closed)
+        await self.pool.release(fresh)
+
+
+if __name__ == "__main__":
+    unittest.main()